@@ -1,6 +1,10 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import logging
+import os
 import re
+import tempfile
 
 # Playlist URLs
 playlists = [
@@ -13,34 +17,64 @@ epg_url = "https://raw.githubusercontent.com/BuddyChewChew/buddylive/refs/heads/
 # Output file
 output_file = "Buddys-VideoAll.m3u"
 
+log = logging.getLogger("buddys_videoall")
+
+# group-title="" tags stripped from the source channels
+GROUP_TITLE_RE = re.compile(rb'group-title="[^"]*"')
+
 def fetch_and_combine_playlists():
-    with open(output_file, "w", encoding="utf-8") as outfile:
-        # Write header with EPG URL
-        outfile.write(f'#EXTM3U x-tvg-url="{epg_url}"\n\n')
-        outfile.write(f'# Generated on {datetime.utcnow().isoformat()} UTC\n\n')  # Add timestamp
-        
-        for url in playlists:
+    # Write header with EPG URL
+    parts = [
+        f'#EXTM3U x-tvg-url="{epg_url}"\n\n'.encode("utf-8"),
+        f'# Generated on {datetime.utcnow().isoformat()} UTC\n\n'.encode("utf-8"),  # Add timestamp
+    ]
+
+    # Fetch every source at once; results are still written in list order
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=min(8, len(playlists))) as pool:
+        futures = [pool.submit(session.get, url, timeout=15) for url in playlists]
+
+        for url, future in zip(playlists, futures):
             try:
-                response = requests.get(url, timeout=15)
+                response = future.result()
                 response.raise_for_status()
-                lines = response.text.splitlines()
+                # The source is already UTF-8, so filter the raw bytes rather
+                # than decoding to str and encoding it all back again
+                body = response.content
+                if body.startswith(b"#EXTM3U"):  # Skip the initial header
+                    body = body.partition(b"\n")[2]
+                # Remove group-title="" tags in one pass over the whole playlist
+                body = GROUP_TITLE_RE.sub(b"", body)
+                if body and not body.endswith(b"\n"):
+                    body += b"\n"
 
                 # Add 📺 source comment before the channels
-                outfile.write(f'# 📺 Source: {url}\n')
+                parts.append(f'# 📺 Source: {url}\n'.encode("utf-8"))
+                parts.append(body)
+                parts.append(b"\n")  # Space between sources
+                log.info("✅ Added channels from %s", url)
 
-                for line in lines:
-                    if not line.startswith("#EXTM3U"):  # Skip the initial header
-                        # Remove group-title="" tags
-                        line = re.sub(r'group-title="[^"]*"', '', line)
-                        outfile.write(line + "\n")
+            except Exception as e:
+                log.error("❌ Failed to fetch %s: %s", url, e)
 
-                outfile.write("\n")  # Space between sources
-                print(f"✅ Added channels from {url}")
+    # Write to a temp file beside the output and rename it into place, so
+    # players never pick up a half-written playlist
+    outfile = tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(os.path.abspath(output_file)),
+                                          prefix=".m3u.", suffix=".tmp", delete=False)
+    try:
+        with outfile:
+            outfile.write(b"".join(parts))
+            outfile.flush()
+            os.fsync(outfile.fileno())
 
-            except Exception as e:
-                print(f"❌ Failed to fetch {url}: {e}")
+        os.chmod(outfile.name, 0o644)  # mkstemp creates files as 0600
+        os.replace(outfile.name, output_file)
+    except BaseException:
+        # don't leave a stray temp file behind for the workflow to commit
+        os.unlink(outfile.name)
+        raise
 
-    print(f"\n✅ Combined playlist saved as '{output_file}' with EPG: {epg_url}")
+    log.info("✅ Combined playlist saved as '%s' with EPG: %s", output_file, epg_url)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s │ %(name)s │ %(message)s")
     fetch_and_combine_playlists()
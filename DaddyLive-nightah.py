@@ -104,7 +104,7 @@ def write_merged_playlist(all_channels, timestamp_line):
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         f.write(final_output)
 
-    print(f"\n✅ Wrote {count} clean channels to {OUTPUT_FILE} ({len(final_output.splitlines())} lines).")
+    print(f"\n✅ Wrote {count} clean channels to {OUTPUT_FILE} ({len(lines)} lines).")
 
 def write_removed_channels(nsfw_channels):
     if not nsfw_channels:
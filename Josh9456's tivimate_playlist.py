@@ -1,14 +1,21 @@
 # main.py – validate links, rebuild direct URLs, rewrite tivimate_playlist.m3u8
 
 import argparse
+import functools
 import logging
 import re
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import defaultdict
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-PREMIUM_RE = re.compile(r'premium(\d+)/mono\.m3u8')
+# the whole direct link (up to any |Header=… suffix), so the same pattern finds
+# the premium IDs in stage 1 and swaps links in place in stage 3
+PREMIUM_RE = re.compile(r'https?://[^\s|]*premium(\d+)/mono\.m3u8')
 
 URL_TEMPLATES = [
     "https://nfsnew.newkso.ru/nfs/premium{num}/mono.m3u8",
@@ -18,86 +25,139 @@ URL_TEMPLATES = [
     "https://ddy6new.newkso.ru/ddy6/premium{num}/mono.m3u8"
 ]
 
+# each template split once around its {num} placeholder, so building a
+# candidate is a plain prefix + id + suffix concatenation
+URL_PARTS = [tuple(tpl.split("{num}")) for tpl in URL_TEMPLATES]
+
+# every candidate lands on one of these few CDN hosts
+HOSTS = tuple(dict.fromkeys(urlparse(tpl).netloc for tpl in URL_TEMPLATES))
+
+# Resolve those hostnames once per process instead of on every new pooled
+# socket in every worker; any other host goes to the system resolver as usual.
+_getaddrinfo = socket.getaddrinfo
+
+@functools.lru_cache(maxsize=None)
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    return _getaddrinfo(host, port, family, type, proto, flags)
+
+def _getaddrinfo_cdn(host, port, family=0, type=0, proto=0, flags=0):
+    if host in HOSTS:
+        return _cached_getaddrinfo(host, port, family, type, proto, flags)
+    return _getaddrinfo(host, port, family, type, proto, flags)
+
+socket.getaddrinfo = _getaddrinfo_cdn
+
 INPUT_PLAYLIST = "tivimate_playlist.m3u8"
 VALID_LINKS_OUT = "links.m3u8"
 
+HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0',
+    'Origin': 'https://jxoplay.xyz',
+    'Referer': 'https://jxoplay.xyz/',
+    'Range': 'bytes=0-0'
+})
+
+# HTTP/1.1 needs a socket per in-flight probe; cap each host's pool and make
+# surplus workers wait for a kept-alive socket rather than open throwaway ones
+MAX_CONNS_PER_HOST = 20
+
+# One keep-alive pool per CDN host, shared by every worker thread, so each host
+# pays the TCP/TLS handshake once. 429/5xx retries (honouring Retry-After) are
+# handled by urllib3 instead of a hand-rolled loop in check().
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=len(HOSTS),
+    pool_maxsize=MAX_CONNS_PER_HOST,
+    pool_block=True,
+    max_retries=Retry(total=3, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET"])))
+
+def host_reachable(host, port=443, timeout=3):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
 # -----------------------------------------------------------------------------
 
 # 1. Validate every possible premium URL extracted from tivimate_playlist.m3u8
 
 # -----------------------------------------------------------------------------
 
-def validate_links(src=INPUT_PLAYLIST, out=VALID_LINKS_OUT, workers=10):
+def validate_links(src=INPUT_PLAYLIST, out=VALID_LINKS_OUT, workers=64):
     log = logging.getLogger("validate_links")
     log.info("Stage 1 ▸ scanning %s", src)
 
-    current_urls = []
-    with open(src, encoding="utf-8") as fin:
-        lines = fin.read().splitlines()
-    i = 0
-    while i < len(lines):
-        if lines[i].startswith("#EXTINF") and i + 1 < len(lines):
-            stream = lines[i + 1].strip()
-            if PREMIUM_RE.search(stream):
-                current_urls.append(stream)
-                log.debug("found ⇒ %s", stream)
-            i += 2
-        else:
-            i += 1
-
-    ids = {m.group(1) for u in current_urls if (m := PREMIUM_RE.search(u))}
+    data = Path(src).read_text(encoding="utf-8")
+    # ID → the direct links the playlist currently uses for it (insertion-ordered)
+    ids = {}
+    for m in PREMIUM_RE.finditer(data):
+        ids.setdefault(m.group(1), {})[m.group(0)] = None
     if not ids:
         log.error("No premium{num} identifiers found – aborting.")
         raise SystemExit(1)
 
     log.info("Found %d unique premium IDs: %s", len(ids), sorted(ids))
-    candidates = [tpl.format(num=i) for i in ids for tpl in URL_TEMPLATES]
+    # one TCP probe per host up front beats a timeout per candidate on a dead host
+    live_hosts = {h for h in HOSTS if host_reachable(h)}
+    for host in HOSTS:
+        if host not in live_hosts:
+            log.warning("Host %s unreachable – skipping its candidates", host)
+    parts = [(pre, suf) for pre, suf in URL_PARTS if urlparse(pre).netloc in live_hosts]
+    candidates = [(i, pre + i + suf) for i in ids for pre, suf in parts]
+    # overlapping templates must not double the probing work
+    candidates = list(dict.fromkeys(candidates))
     log.info("Generated %d candidate URLs to test", len(candidates))
 
-    def check(url):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0',
-            'Origin': 'https://jxoplay.xyz',
-            'Referer': 'https://jxoplay.xyz/'
-        }
-        for attempt in range(1, 4):
-            try:
-                log.debug("HEAD %s (try %d)", url, attempt)
-                r = requests.head(url, headers=headers, timeout=10, allow_redirects=True)
-                if r.status_code == 200:
-                    return url
-                if r.status_code == 429:
-                    log.debug("429 – sleeping 5 s before retry")
-                    time.sleep(5)
-                    continue
-                if r.status_code == 404:
-                    return None
-                # fallback to GET for odd responses
-                log.debug("GET %s (try %d)", url, attempt)
-                r = requests.get(url, headers=headers, timeout=10, stream=True, allow_redirects=True)
-                if r.status_code == 200:
-                    return url
-                if r.status_code == 404:
-                    return None
-            except requests.RequestException as e:
-                log.debug("Request error %s: %s", url, e)
-                return None
-        return None
+    def probe(url):
+        try:
+            # a one-byte ranged GET answers like HEAD on CDNs that mishandle HEAD,
+            # without ever pulling the whole manifest. The (tiny) body is read in
+            # full so the socket goes back to the pool instead of being closed
+            log.debug("GET %s", url)
+            r = SESSION.get(url, headers=HEADERS, timeout=10, allow_redirects=True)
+            return r.status_code in (200, 206)
+        except requests.RequestException as e:
+            log.debug("Request error %s: %s", url, e)
+        return False
+
+    groups = {}
+    for candidate in candidates:
+        groups.setdefault(candidate[0], []).append(candidate)
+
+    # each ID is one task, so the pool spreads the IDs, not the templates,
+    # across the workers. The links the playlist already uses go first and are
+    # kept if they still answer, so a healthy entry is never swapped for
+    # whichever host replied first; only when they are all dead are the other
+    # templates tried in order, stopping at the first that works
+    def check(group):
+        in_use = ids[group[0][0]]
+        current = [c for c in group if c[1] in in_use]
+        found = [c for c in current if probe(c[1])]
+        if found:
+            return found
+        for candidate in group:
+            if candidate[1] not in in_use and probe(candidate[1]):
+                return [candidate]
+        return []
 
     valid = []
     with ThreadPoolExecutor(max_workers=workers) as pool:
-        futures = {pool.submit(check, u): u for u in candidates}
-        for fut in as_completed(futures):
-            res = fut.result()
-            if res:
+        futures = [pool.submit(check, group) for group in groups.values()]
+        # read back in submission order so links.m3u8 is stable run to run
+        for fut in futures:
+            for res in fut.result():
                 valid.append(res)
-                log.info("✓ %s", res)
+                log.info("✓ %s", res[1])
 
     with open(out, "w", encoding="utf-8") as fout:
-        fout.write("\n".join(valid))
+        fout.write("\n".join(url for _, url in valid))
 
     log.info("Stage 1 complete – %d valid URLs written to %s", len(valid), out)
-    return valid
+    # hand the playlist text on so stage 3 does not have to re-read it
+    return valid, data
 
 # -----------------------------------------------------------------------------
 
@@ -107,13 +167,10 @@ def validate_links(src=INPUT_PLAYLIST, out=VALID_LINKS_OUT, workers=10):
 
 def build_map(valid_links):
     log = logging.getLogger("build_map")
-    id_to_valids = defaultdict(list)
-    for link in valid_links:
-        m = PREMIUM_RE.search(link)
-        if m:
-            id_ = m.group(1)
-            id_to_valids[id_].append(link)
-            log.debug("%s → ID %s", link, id_)
+    id_to_valids = {}
+    for id_, link in valid_links:
+        id_to_valids.setdefault(id_, []).append(link)
+        log.debug("%s → ID %s", link, id_)
     log.info("Stage 2 complete – %d IDs with valid links", len(id_to_valids))
     return id_to_valids
 
@@ -123,38 +180,27 @@ def build_map(valid_links):
 
 # -----------------------------------------------------------------------------
 
-def rewrite_streams(src=INPUT_PLAYLIST, id_to_valids=None):
+def rewrite_streams(data, id_to_valids, src=INPUT_PLAYLIST):
     log = logging.getLogger("rewrite_streams")
-    lines = open(src, encoding="utf-8").read().splitlines()
-    out_lines, replaced = [], 0
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        if line.startswith("#EXTINF") and i + 1 < len(lines):
-            out_lines.append(line)  # keep EXTINF
-            stream = lines[i + 1].strip()
-            new_stream = stream  # default: keep
-            m = PREMIUM_RE.search(stream)
-            if m:
-                id_ = m.group(1)
-                if id_ in id_to_valids:
-                    valids = id_to_valids[id_]
-                    if stream not in valids and valids:  # current invalid, but new valid exists
-                        new_stream = valids[0]  # pick the first valid one
-                        log.debug("Replaced %s → %s", stream, new_stream)
-                        replaced += 1
-                    else:
-                        log.debug("Kept valid %s", stream)
-                else:
-                    log.debug("No valid links for ID %s, kept %s", id_, stream)
-            out_lines.append(new_stream)
-            i += 2
-        else:
-            out_lines.append(line)
-            i += 1
-
+    replaced = 0
+
+    def swap(m):
+        nonlocal replaced
+        stream, id_ = m.group(0), m.group(1)
+        valids = id_to_valids.get(id_)
+        if not valids:
+            log.debug("No valid links for ID %s, kept %s", id_, stream)
+            return stream
+        if stream in valids:
+            log.debug("Kept valid %s", stream)
+            return stream
+        log.debug("Replaced %s → %s", stream, valids[0])
+        replaced += 1
+        return valids[0]
+
+    out = PREMIUM_RE.sub(swap, data)
     with open(src, "w", encoding="utf-8") as fout:
-        fout.write("\n".join(out_lines) + "\n")
+        fout.write(out if out.endswith("\n") else out + "\n")
 
     log.info("Stage 3 complete – %d stream URLs replaced", replaced)
 
@@ -169,6 +215,8 @@ def main():
         description="Refresh tivimate_playlist.m3u8 with working direct links")
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="show DEBUG-level detail (per-URL checks, replacements)")
+    parser.add_argument("-w", "--workers", type=int, default=64,
+                        help="number of concurrent link checks (default: 64)")
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -176,9 +224,9 @@ def main():
         format="%(levelname)s │ %(name)s │ %(message)s")
 
     logging.info("▶️ Starting playlist refresh (verbose=%s)", args.verbose)
-    valid = validate_links()
+    valid, data = validate_links(workers=args.workers)
     id_to_valids = build_map(valid)
-    rewrite_streams(id_to_valids=id_to_valids)
+    rewrite_streams(data, id_to_valids)
     logging.info("✅ Done – playlist refreshed")
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
+import io
 import requests
-import re
 import socket
+import urllib3
+import urllib3.util.connection
 from datetime import datetime
 
 UPSTREAM_URL = "https://iptv-scraper-re.vercel.app/nflwebcast/nflwebcast.m3u8"
@@ -9,22 +11,41 @@ OUTPUT_FILE = "NFL-Webcast.m3u"
 FORCED_GROUP = "NFL"
 FORCED_TVG_ID = "24.7.Dummy.us"
 
-# Force IPv4 for all requests
-def force_ipv4(host, port=0, family=0, type=0, proto=0, flags=0):
-    return [(socket.AF_INET, socket.SOCK_STREAM, proto, "", (host, port))]
-socket.getaddrinfo = force_ipv4
+# Force IPv4 for all requests: urllib3 still resolves names through DNS, it
+# just asks for A records only
+urllib3.util.connection.allowed_gai_family = lambda: socket.AF_INET
+
+SESSION = requests.Session()
+
+def _strip_attr(line, name):
+    # drop every name="..." attribute with plain scans – same result as
+    # re.sub(name + '="[^"]*"', '', line)
+    key = name + '="'
+    out, pos = [], 0
+    while (i := line.find(key, pos)) != -1:
+        j = line.find('"', i + len(key))
+        if j == -1:
+            break
+        out.append(line[pos:i])
+        pos = j + 1
+    out.append(line[pos:])
+    return ''.join(out)
 
 def inject_group_and_tvgid(extinf_line):
-    extinf_line = re.sub(r'tvg-id="[^"]*"', '', extinf_line)
-    extinf_line = re.sub(r'group-title="[^"]*"', '', extinf_line)
-    extinf_line = re.sub(r'(#EXTINF:-1)\s+-1\s+', r'\1 ', extinf_line)
+    extinf_line = _strip_attr(extinf_line, 'tvg-id')
+    extinf_line = _strip_attr(extinf_line, 'group-title')
+    # squash whitespace up front so a duplicated "-1" duration is a plain literal
+    # (a trailing run still counts as the whitespace after it)
+    trailing = ' ' if extinf_line[-1:].isspace() else ''
+    extinf_line = ' '.join(extinf_line.split()) + trailing
+    extinf_line = extinf_line.replace('#EXTINF:-1 -1 ', '#EXTINF:-1 ')
     extinf_line = extinf_line.replace(
         "#EXTINF:-1",
         f'#EXTINF:-1 tvg-id="{FORCED_TVG_ID}" group-title="{FORCED_GROUP}"',
         1
     )
-    extinf_line = re.sub(r'\s+', ' ', extinf_line).strip()
-    extinf_line = re.sub(r' ,', ',', extinf_line)
+    extinf_line = ' '.join(extinf_line.split())
+    extinf_line = extinf_line.replace(' ,', ',')
     return extinf_line
 
 def main():
@@ -36,29 +57,36 @@ def main():
         'Cache-Control': 'no-cache'
     }
 
-    try:
-        res = requests.get(UPSTREAM_URL, headers=headers, timeout=30)
-        res.raise_for_status()
-        lines = res.text.strip().splitlines()
-        print(f"[✅] Upstream fetched: {len(lines)} lines.")
-    except requests.exceptions.RequestException as e:
-        print(f"[❌] Failed to fetch upstream: {e}")
-        return
-
     output_lines = [
         f'#EXTM3U url-tvg="{EPG_URL}"',
         f'# Last forced update: {datetime.utcnow().isoformat()}Z'
     ]
 
-    for line in lines:
-        line = line.strip()
-        if not line or line.startswith("#EXTM3U"):
-            continue
-        if line.startswith("#EXTINF:-1"):
-            fixed_line = inject_group_and_tvgid(line)
-            output_lines.append(fixed_line)
-        else:
-            output_lines.append(line)
+    # Decode and fix up the body line by line as it arrives instead of
+    # materialising res.text plus a full list of its lines
+    try:
+        with SESSION.get(UPSTREAM_URL, headers=headers, timeout=30, stream=True) as res:
+            res.raise_for_status()
+            res.raw.decode_content = True
+            # Without this urllib3 marks the body closed once drained and the
+            # TextIOWrapper raises on its next read instead of ending the loop
+            res.raw.auto_close = False
+            reader = io.TextIOWrapper(res.raw, encoding=res.encoding or 'utf-8', errors='replace', newline='')
+            count = 0
+            for line in reader:
+                count += 1
+                line = line.strip()
+                if not line or line.startswith("#EXTM3U"):
+                    continue
+                if line.startswith("#EXTINF:-1"):
+                    fixed_line = inject_group_and_tvgid(line)
+                    output_lines.append(fixed_line)
+                else:
+                    output_lines.append(line)
+        print(f"[✅] Upstream fetched: {count} lines.")
+    except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+        print(f"[❌] Failed to fetch upstream: {e}")
+        return
 
     try:
         with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
@@ -16,6 +16,12 @@ COUNTRY_ALIASES = {
     "United States": ["United States", "USA", "US", "America"]
 }
 
+# Lower-cased once here rather than for every alias on every EXTINF line
+COUNTRY_ALIASES_LOWER = {
+    country: [alias.lower() for alias in aliases]
+    for country, aliases in COUNTRY_ALIASES.items()
+}
+
 def fetch_playlist(url):
     r = requests.get(url)
     r.raise_for_status()
@@ -53,8 +59,8 @@ def parse_and_filter(lines):
             search_area = (country_text + " " + title_text).lower()
 
             matched_country = ""
-            for c, aliases in COUNTRY_ALIASES.items():
-                if any(alias.lower() in search_area for alias in aliases):
+            for c, aliases in COUNTRY_ALIASES_LOWER.items():
+                if any(alias in search_area for alias in aliases):
                     matched_country = c
                     break
 
@@ -1,7 +1,12 @@
+import io
 import os
 import gzip
+import shutil
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 name = "daddylive-channels"
 save_as_gz = True  
@@ -13,65 +18,149 @@ tvg_ids_file = os.path.join(os.path.dirname(__file__), f"{name}-tvg-ids.txt")
 output_file = os.path.join(output_dir, f"{name}-epg.xml")
 output_file_gz = output_file + '.gz'
 
-def fetch_and_extract_xml(url):
-    response = requests.get(url)
-    if response.status_code != 200:
-        print(f"Failed to fetch {url}")
+# Downloads are I/O bound and zlib releases the GIL while inflating,
+# so a thread pool overlaps the sources
+MAX_WORKERS = 8
+# Matches gzip's own read chunk; also stops short socket reads reaching gzip
+READ_BUFFER_SIZE = 128 * 1024
+
+# Generic game titles that get the matchup from <sub-title> appended
+SUBTITLED_TITLES = frozenset({'NHL Hockey', 'Live: NFL Football'})
+
+# Nearly every feed is on epgshare01, so that host's pool needs one
+# keep-alive connection per worker or the extras are dropped after use.
+# Connection errors and 429/5xx are retried with backoff (honouring
+# Retry-After) on the same pooled connections.
+adapter = HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=1,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"])),
+)
+session = requests.Session()
+session.mount("http://", adapter)
+session.mount("https://", adapter)
+
+def fetch_and_extract_xml(url, valid_tvg_ids):
+    print(f"Fetching xml ({url})...")
+    try:
+        response = session.get(url, timeout=60, stream=True)
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch {url}: {e}")
         return None
 
-    if url.endswith('.gz'):
-        try:
-            decompressed_data = gzip.decompress(response.content)
-            return ET.fromstring(decompressed_data)
-        except Exception as e:
-            print(f"Failed to decompress and parse XML from {url}: {e}")
+    with response:
+        if response.status_code != 200:
+            print(f"Failed to fetch {url}")
             return None
-    else:
+
+        # Parse straight off the socket so inflating and parsing overlap the
+        # download, rather than buffering the whole feed in response.content
+        response.raw.decode_content = True
+        # urllib3 reports the body closed once it is drained, and the
+        # BufferedReader would then fail its final read instead of seeing EOF
+        response.raw.auto_close = False
+        source = io.BufferedReader(response.raw, buffer_size=READ_BUFFER_SIZE)
+        if url.endswith('.gz'):
+            source = gzip.GzipFile(fileobj=source)
+            action = "decompress and parse"
+        else:
+            action = "parse"
+
+        # One streaming pass keeps only wanted elements. Each handled channel or
+        # programme is detached from the <tv> root iterparse builds as soon as
+        # it closes, so memory holds the kept elements, not the whole feed
+        channels = []
+        programmes = []
         try:
-            return ET.fromstring(response.content)
+            context = ET.iterparse(source, events=('start', 'end'))
+            _, tv = next(context)
+            for event, elem in context:
+                if event != 'end':
+                    continue
+                tag = elem.tag
+                if tag == 'channel':
+                    if elem.get('id') in valid_tvg_ids:
+                        channels.append(elem)
+                elif tag == 'programme':
+                    if elem.get('channel') in valid_tvg_ids:
+                        programmes.append(elem)
+                else:
+                    continue
+                tv.clear()
         except Exception as e:
-            print(f"Failed to parse XML from {url}: {e}")
+            print(f"Failed to {action} XML from {url}: {e}")
             return None
 
+    return channels, programmes
+
 def filter_and_build_epg(urls):
     with open(tvg_ids_file, 'r') as file:
-        valid_tvg_ids = set(line.strip() for line in file)
+        valid_tvg_ids = frozenset(line.strip() for line in file)
 
     root = ET.Element('tv')
 
-    for url in urls:
-        print(f"Fetching xml ({url})...")
-        epg_data = fetch_and_extract_xml(url)
+    # A source listed twice would be fetched, parsed and merged twice
+    urls = list(dict.fromkeys(urls))
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(lambda url: fetch_and_extract_xml(url, valid_tvg_ids), urls))
+
+    # Index everything by tvg-id in one pass over the sources, in list order.
+    # An id carried by several feeds takes its <channel> from the first feed
+    # that defines it; its programmes are pooled from every feed, and only a
+    # repeat of a (channel, start) slot already taken is dropped
+    channel_defs = {}
+    buckets = {}
+    slots = set()
+    for epg_data in results:
         if epg_data is None:
             continue
 
-        for channel in epg_data.findall('channel'):
-            tvg_id = channel.get('id')
-            if tvg_id in valid_tvg_ids:
-                print(f"tvg-id -> {tvg_id}")
-                root.append(channel)
-
-        for programme in epg_data.findall('programme'):
-            tvg_id = programme.get('channel')
-            if tvg_id in valid_tvg_ids:
-                title = programme.find('title')
-                if title is not None:
-                    title_text = title.text if title is not None else 'No title'
+        channels, programmes = epg_data
 
-                    if title_text == 'NHL Hockey' or title_text == 'Live: NFL Football':
-                        subtitle = programme.find('sub-title')
-                        subtitle_text = subtitle.text if subtitle else 'No subtitle'
-                        programme.find('title').text = title_text + " " + subtitle_text
+        for channel in channels:
+            channel_defs.setdefault(channel.get('id'), channel)
 
-                    root.append(programme)
+        for programme in programmes:
+            tvg_id = programme.get('channel')
+            slot = (tvg_id, programme.get('start'))
+            if slot in slots:
+                continue
+            slots.add(slot)
+            buckets.setdefault(tvg_id, []).append(programme)
+
+    for tvg_id, channel in channel_defs.items():
+        print(f"tvg-id -> {tvg_id} ({len(buckets.get(tvg_id, ()))} programmes)")
+        root.append(channel)
+
+    # Programmes are emitted grouped per channel
+    for bucket in buckets.values():
+        for programme in bucket:
+            title = programme.find('title')
+            if title is not None:
+                title_text = title.text
+
+                if title_text in SUBTITLED_TITLES:
+                    subtitle = programme.find('sub-title')
+                    # An Element with no children is falsy, so test for None
+                    if subtitle is not None and subtitle.text:
+                        subtitle_text = subtitle.text
+                    else:
+                        subtitle_text = 'No subtitle'
+                    title.text = title_text + " " + subtitle_text
+
+                root.append(programme)
 
     tree = ET.ElementTree(root)
     tree.write(output_file, encoding='utf-8', xml_declaration=True)
     print(f"New EPG saved to {output_file}")
 
+    # Compress the file just written instead of serializing the tree again
     if save_as_gz:
-        with gzip.open(output_file_gz, 'wb') as f:
-            tree.write(f, encoding='utf-8', xml_declaration=True)
+        with open(output_file, 'rb') as src, gzip.open(output_file_gz, 'wb') as f:
+            shutil.copyfileobj(src, f, READ_BUFFER_SIZE)
         print(f"New EPG saved to {output_file_gz}")
 
 
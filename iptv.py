@@ -1,4 +1,7 @@
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 import re
 from datetime import datetime
 
@@ -21,6 +24,17 @@ playlist_urls = [
 
 EPG_URL = "https://tinyurl.com/DrewLive002-epg"
 OUTPUT_FILE = "MergedPlaylist.m3u8"
+WRITE_BUFFER_SIZE = 128 * 1024
+
+TITLE_RE = re.compile(r',([^,]+)$')
+GROUP_RE = re.compile(r'group-title="([^"]+)"')
+
+# Most sources live on raw.githubusercontent.com, so keep connections alive
+# and pay the TLS handshake once per host instead of once per playlist
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=2)
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
 
 # -------------------------
 # Fetch playlist content
@@ -28,7 +42,7 @@ OUTPUT_FILE = "MergedPlaylist.m3u8"
 def fetch_playlist(url):
     print(f"\n🔹 Fetching playlist: {url}")
     try:
-        res = requests.get(url, timeout=15)
+        res = _SESSION.get(url, timeout=15)
         res.raise_for_status()
         print(f"✅ Successfully fetched: {url} ({len(res.content)} bytes)")
         return res.content.decode('utf-8', errors='ignore').splitlines()
@@ -74,13 +88,22 @@ def write_merged_playlist(channels):
     for extinf, headers, url in channels:
         unique_channels[url] = (extinf, headers, url)
 
-    sorted_channels = sorted(unique_channels.values(), key=lambda x: re.search(r',([^,]+)$', x[0]).group(1).lower())
+    # Pull the sort key and group out of each EXTINF once, up front, instead
+    # of re-running the regexes while sorting and again while writing
+    items = []
+    for extinf, headers, url in unique_channels.values():
+        title_match = TITLE_RE.search(extinf)
+        group_match = GROUP_RE.search(extinf)
+        items.append((
+            title_match.group(1).lower() if title_match else "",
+            group_match.group(1) if group_match else "Other",
+            extinf, headers, url,
+        ))
+    items.sort(key=itemgetter(0))
 
     current_group = None
     total_channels_written = 0
-    for extinf, headers, url in sorted_channels:
-        group_match = re.search(r'group-title="([^"]+)"', extinf)
-        group_name = group_match.group(1) if group_match else "Other"
+    for _, group_name, extinf, headers, url in items:
         if group_name != current_group:
             if current_group is not None:
                 lines.append("")
@@ -91,8 +114,10 @@ def write_merged_playlist(channels):
         lines.append(url)
         total_channels_written += 1
 
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write("\n".join(lines) + "\n")
+    # Stream the lines out through a large buffer rather than joining a
+    # second full copy of the playlist in memory first
+    with open(OUTPUT_FILE, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.writelines(line + "\n" for line in lines)
 
     print(f"\n✅ Merged playlist written to {OUTPUT_FILE}.")
     print(f"📊 Total unique channels merged: {total_channels_written}")
@@ -103,8 +128,11 @@ def write_merged_playlist(channels):
 if __name__ == "__main__":
     print(f"🕒 Starting merge at {datetime.now()}...")
     all_channels = []
-    for url in playlist_urls:
-        lines = fetch_playlist(url)
+    # Fetches are I/O-bound, so run them side by side; map() keeps source
+    # order, which decides which duplicate URL wins in the merge
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        fetched = list(pool.map(fetch_playlist, playlist_urls))
+    for url, lines in zip(playlist_urls, fetched):
         parsed = parse_playlist(lines, source_url=url)
         all_channels.extend(parsed)
 
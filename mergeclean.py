@@ -31,7 +31,7 @@ EPG_URL = "http://drewlive24.duckdns.org:8081/merged2_epg.xml.gz"
 OUTPUT_FILE = "MergedCleanPlaylist.m3u8"
 REMOVED_FILE = "Removed_NSFW.m3u8"
 
-def fetch_playlist(url, retries=3, delay=5):
+def fetch_playlist(url, retries=3, backoff=0.3, max_delay=2):
     """Fetch playlist with retry for non-raw URLs."""
     print(f"Fetching: {url}")
     for attempt in range(1, retries + 1):
@@ -42,7 +42,10 @@ def fetch_playlist(url, retries=3, delay=5):
         except Exception as e:
             print(f"❌ Attempt {attempt} failed for {url}: {e}")
             if "raw.githubusercontent.com" not in url and attempt < retries:
-                print(f"⏳ Retrying in {delay} seconds...")
+                # Short exponential backoff: these are static file pulls, not a
+                # rate-limited API, so long idle waits only stretch the run
+                delay = min(backoff * 2 ** (attempt - 1), max_delay)
+                print(f"⏳ Retrying in {delay:.1f} seconds...")
                 time.sleep(delay)
             else:
                 break
@@ -131,7 +134,7 @@ def write_merged_playlist(all_channels, timestamp_line):
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         f.write(final_output)
 
-    print(f"\n✅ Wrote {count} clean channels to {OUTPUT_FILE} ({len(final_output.splitlines())} lines).")
+    print(f"\n✅ Wrote {count} clean channels to {OUTPUT_FILE} ({len(lines)} lines).")
 
 def write_removed_channels(nsfw_channels):
     if not nsfw_channels:
@@ -166,8 +169,10 @@ if __name__ == "__main__":
         all_channels.extend(parse_playlist(lines, url))
 
     # Filter NSFW content
-    nsfw_channels = [entry for entry in all_channels if is_nsfw(*entry)]
-    clean_channels = [entry for entry in all_channels if not is_nsfw(*entry)]
+    nsfw_channels = []
+    clean_channels = []
+    for entry in all_channels:
+        (nsfw_channels if is_nsfw(*entry) else clean_channels).append(entry)
 
     write_removed_channels(nsfw_channels)
     write_merged_playlist(clean_channels, timestamp_line)